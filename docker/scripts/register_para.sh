@@ -17,10 +17,34 @@ wait_for_file () {
     if [ -z "$limit" ]; then
         limit=10
     fi
-    count=0
-    while [ "$count" -lt "$limit" ]; do
+    # EPOCHREALTIME with the decimal point dropped is the time in
+    # microseconds, which keeps the deadline exact now that polls are only
+    # milliseconds apart.
+    start="${EPOCHREALTIME/[.,]/}"
+    deadline=$((start + limit * 1000000))
+    dir="$(dirname "$path")"
+    # Where inotify is usable, block on filesystem events instead of sleeping
+    # between checks. Each wait is capped at one second so that a file created
+    # just before inotifywait starts watching, or one written over a network
+    # filesystem which doesn't deliver events, is still picked up by the next
+    # check.
+    if command -v inotifywait &> /dev/null && [ -d "$dir" ]; then
+        while [ ! -s "$path" ] && [ "${EPOCHREALTIME/[.,]/}" -lt "$deadline" ]; do
+            inotifywait -qq -t 1 -e create -e close_write -e moved_to "$dir" && rc=0 || rc=$?
+            # 0 is an event and 2 a timeout; anything else means the watch
+            # couldn't be set up, so fall back to polling.
+            if [ "$rc" -ne 0 ] && [ "$rc" -ne 2 ]; then
+                break
+            fi
+        done
+    fi
+    # Otherwise poll, backing off exponentially so that a file which shows up
+    # shortly after the first check isn't held up by a full second's sleep.
+    delays=( 0.005 0.01 0.02 0.05 0.1 0.2 0.5 1 )
+    step=0
+    while true; do
         if [ -s "$path" ]; then
-            echo "$path found after $count seconds"
+            echo "$path found after $(( (${EPOCHREALTIME/[.,]/} - start) / 1000000 )) seconds"
             # now ensure that the file size is stable: it's not still being written
             oldsize=0
             size="$(sizeof "$path")"
@@ -31,10 +55,15 @@ wait_for_file () {
             done
             return
         fi
-        count=$((count+1))
-        sleep 1
+        if [ "${EPOCHREALTIME/[.,]/}" -ge "$deadline" ]; then
+            break
+        fi
+        sleep "${delays[$step]}"
+        if [ "$step" -lt $((${#delays[@]} - 1)) ]; then
+            step=$((step+1))
+        fi
     done
-    echo "$path not found after $count seconds"
+    echo "$path not found after $(( (${EPOCHREALTIME/[.,]/} - start) / 1000000 )) seconds"
     exit 1
 }
 